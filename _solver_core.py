@@ -0,0 +1,233 @@
+"""
+Backtracking kernels shared by the Sudoku generator and solver.
+
+Boards are flat buffers of 81 cells (index row * 9 + col, 0 = empty).
+Row, column and block usage is kept in three buffers of 9 bitmasks,
+where bit n-1 is set when digit n is already used in that unit.
+
+When Numba is installed the kernels are compiled to native code with
+@njit; otherwise the very same functions run as plain Python.
+"""
+import random
+from array import array
+from typing import Tuple
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # pure-Python fallback
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """No-op replacement for numba.njit."""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+Masks = Tuple[array, array, array]
+
+# Lookup tables for the fixed 9x9 size, replacing divisions and shifts
+BOX_INDEX = tuple((r // 3) * 3 + c // 3 for r in range(9) for c in range(9))
+BIT = tuple(1 << i for i in range(9))  # BIT[n - 1] is the mask bit of digit n
+
+
+def new_board() -> bytearray:
+    """Return an empty flat board."""
+    return bytearray(81)
+
+
+def new_masks() -> Masks:
+    """Return empty (rmask, cmask, bmask) buffers."""
+    return array("H", [0] * 9), array("H", [0] * 9), array("H", [0] * 9)
+
+
+@njit(cache=True)
+def seed(value):
+    """Seed the random generator used by fill() (Numba keeps its own state)."""
+    random.seed(value)
+
+
+if HAVE_NUMBA:
+    @njit(cache=True)
+    def _popcount(mask):
+        count = 0
+        while mask:
+            mask &= mask - 1
+            count += 1
+        return count
+
+    @njit(cache=True)
+    def _digit(bit):
+        n = 1
+        while bit > 1:
+            bit >>= 1
+            n += 1
+        return n
+else:
+    # As plain Python, the builtin int/str operations beat the bit loops
+    try:
+        _popcount = int.bit_count  # Python 3.10+
+    except AttributeError:
+        def _popcount(mask):
+            return bin(mask).count("1")
+
+    _digit = int.bit_length
+
+
+@njit(cache=True)
+def build_masks(board, rmask, cmask, bmask):
+    """
+    Fill the (zeroed) masks from the digits already on the board.
+
+    :return: False if a digit is repeated in a row, column or block.
+    """
+    for i in range(81):
+        n = board[i]
+        if n == 0:
+            continue
+        r = i // 9
+        c = i % 9
+        b = BOX_INDEX[i]
+        bit = BIT[n - 1]
+        if (rmask[r] | cmask[c] | bmask[b]) & bit:
+            return False
+        rmask[r] |= bit
+        cmask[c] |= bit
+        bmask[b] |= bit
+    return True
+
+
+@njit(cache=True)
+def _find_empty(board, rmask, cmask, bmask):
+    """
+    Return the empty cell with the fewest candidates (MRV heuristic).
+
+    :return: (cell, candidates_mask); cell is -1 if the board is full.
+             A zero mask means the board is a dead end.
+    """
+    popcount = _popcount
+    best = -1
+    best_free = 0
+    best_count = 10
+    for i in range(81):
+        if board[i] != 0:
+            continue
+        r = i // 9
+        c = i % 9
+        free = 0x1FF ^ (rmask[r] | cmask[c] | bmask[BOX_INDEX[i]])
+        count = popcount(free)
+        if count < best_count:
+            best = i
+            best_free = free
+            best_count = count
+            if count <= 1:
+                break  # dead end or naked single
+    return best, best_free
+
+
+@njit(cache=True)
+def _propagate_singles(board, rmask, cmask, bmask):
+    """
+    Fill every cell that has a single candidate, until nothing changes.
+
+    :return: False if some empty cell has no candidates left.
+    """
+    popcount = _popcount
+    digit = _digit
+    changed = True
+    while changed:
+        changed = False
+        for i in range(81):
+            if board[i] != 0:
+                continue
+            r = i // 9
+            c = i % 9
+            b = BOX_INDEX[i]
+            free = 0x1FF ^ (rmask[r] | cmask[c] | bmask[b])
+            if free == 0:
+                return False
+            if popcount(free) == 1:
+                board[i] = digit(free)
+                rmask[r] |= free
+                cmask[c] |= free
+                bmask[b] |= free
+                changed = True
+    return True
+
+
+@njit(cache=True)
+def _search(board, rmask, cmask, bmask, randomize):
+    """
+    Depth-first search over the empty cells, most constrained cell first.
+
+    Written as a loop with explicit stacks instead of recursion so the
+    same code compiles under Numba. With 'randomize' the candidates of
+    each cell are tried in random order.
+    """
+    cells = [0] * 81       # cell chosen at each depth
+    counts = [0] * 81      # number of candidates at each depth
+    tried = [0] * 81       # candidates already tried at each depth
+    order = [0] * 729      # candidate bits, 9 slots per depth
+    find_empty = _find_empty
+    digit = _digit
+
+    depth = 0
+    while True:
+        cell, free = find_empty(board, rmask, cmask, bmask)
+        if cell < 0:
+            return True  # board completed
+
+        base = depth * 9
+        n = 0
+        for i in range(9):
+            if free & BIT[i]:
+                order[base + n] = BIT[i]
+                n += 1
+        if randomize:
+            for i in range(n - 1, 0, -1):  # Fisher-Yates
+                j = random.randint(0, i)
+                order[base + i], order[base + j] = order[base + j], order[base + i]
+        cells[depth] = cell
+        counts[depth] = n
+        tried[depth] = 0
+
+        # Place the next untried candidate, backtracking while none is left
+        while True:
+            cell = cells[depth]
+            r = cell // 9
+            c = cell % 9
+            b = BOX_INDEX[cell]
+            if board[cell] != 0:
+                bit = BIT[board[cell] - 1]
+                rmask[r] ^= bit
+                cmask[c] ^= bit
+                bmask[b] ^= bit
+                board[cell] = 0
+            k = tried[depth]
+            if k < counts[depth]:
+                bit = order[depth * 9 + k]
+                tried[depth] = k + 1
+                board[cell] = digit(bit)
+                rmask[r] |= bit
+                cmask[c] |= bit
+                bmask[b] |= bit
+                depth += 1
+                break
+            depth -= 1
+            if depth < 0:
+                return False
+
+
+@njit(cache=True)
+def fill(board, rmask, cmask, bmask):
+    """Randomly complete the board into a full valid solution."""
+    return _search(board, rmask, cmask, bmask, True)
+
+
+@njit(cache=True)
+def solve(board, rmask, cmask, bmask):
+    """Solve the board in place: propagate naked singles, then backtrack."""
+    if not _propagate_singles(board, rmask, cmask, bmask):
+        return False
+    return _search(board, rmask, cmask, bmask, False)
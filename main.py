@@ -1,9 +1,16 @@
 import tkinter as tk
 from tkinter import messagebox
+import queue
 import random
-from typing import List, Optional, Tuple
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
 
-Board = List[List[int]]  # alias para legibilidad
+import _solver_core
+from _solver_core import BIT
+
+Board = bytearray  # 81 cells, board[row * 9 + col], 0 = empty
+ALL_CELLS = tuple(range(81))  # flat indices of every cell
+_DIGITS = frozenset("123456789")  # valid single-character cell contents
 
 
 class SudokuGenerator:
@@ -14,6 +21,7 @@ class SudokuGenerator:
     def __init__(self, seed: Optional[int] = None) -> None:
         if seed is not None:
             random.seed(seed)
+            _solver_core.seed(seed)
 
     # ------------------------------------------------ #
     # ------------------ Public API ------------------ #
@@ -24,11 +32,11 @@ class SudokuGenerator:
         Generate a new Sudoku puzzle.
 
         :param clues: number of filled cells to keep (higher = easier).
-        :return: 9x9 board with 0 for empty cells.
+        :return: flat 9x9 board with 0 for empty cells.
         """
-        board = [[0] * 9 for _ in range(9)]
+        board = _solver_core.new_board()
         self._fill_board(board)
-        puzzle = [row[:] for row in board]
+        puzzle = board[:]
         self._remove_cells(puzzle, 81 - clues)
         return puzzle
 
@@ -38,64 +46,20 @@ class SudokuGenerator:
     
     def _fill_board(self, board: Board) -> bool:
         """Use backtracking to fill the board with a complete valid solution."""
-        empty = self._find_empty(board)
-        if not empty:
-            return True  # board completed
-
-        row, col = empty
-        numbers = list(range(1, 10))
-        random.shuffle(numbers)
-
-        for num in numbers:
-            if self._is_valid(board, row, col, num):
-                board[row][col] = num
-                if self._fill_board(board):
-                    return True
-                board[row][col] = 0
-        return False
-
-    def _find_empty(self, board: Board) -> Optional[Tuple[int, int]]:
-        """Return the next empty cell (row, col), or None if full."""
-        for r in range(9):
-            for c in range(9):
-                if board[r][c] == 0:
-                    return r, c
-        return None
-
-    def _is_valid(self, board: Board, row: int, col: int, num: int) -> bool:
-        """Check if 'num' can be placed at (row, col) respecting Sudoku rules."""
-        # Row
-        if any(board[row][c] == num for c in range(9)):
-            return False
-        # Column
-        if any(board[r][col] == num for r in range(9)):
-            return False
-        # 3x3 block
-        start_row = (row // 3) * 3
-        start_col = (col // 3) * 3
-        for r in range(start_row, start_row + 3):
-            for c in range(start_col, start_col + 3):
-                if board[r][c] == num:
-                    return False
-        return True
+        return _solver_core.fill(board, *_solver_core.new_masks())
 
     def _remove_cells(self, board: Board, to_remove: int) -> None:
         """
         Remove 'to_remove' cells from the board to create a puzzle.
 
+        The board is expected to be completely filled, so any sample of
+        distinct cells removes exactly 'to_remove' numbers.
+
         Note: this version does not guarantee a unique solution, but it is
         good enough for a portfolio project and casual play.
         """
-        positions = [(r, c) for r in range(9) for c in range(9)]
-        random.shuffle(positions)
-
-        removed = 0
-        for row, col in positions:
-            if removed >= to_remove:
-                break
-            if board[row][col] != 0:
-                board[row][col] = 0
-                removed += 1
+        for idx in random.sample(ALL_CELLS, to_remove):
+            board[idx] = 0
 
 
 class SudokuGUI:
@@ -108,6 +72,9 @@ class SudokuGUI:
     - Auto-checks the whole board when there are no empty cells.
     """
 
+    CELL_BINDTAG = "SudokuCell"  # bindtag shared by all grid entries
+    CLUES = 35  # adjust clues for difficulty
+
     def __init__(self, root: tk.Tk) -> None:
         self.root = root
         self.root.title("Sudoku Game")
@@ -115,10 +82,20 @@ class SudokuGUI:
         self.root.resizable(False, False)
 
         self.generator = SudokuGenerator()
-        self.board_vars: List[List[tk.StringVar]] = [
-            [tk.StringVar() for _ in range(9)] for _ in range(9)
-        ]
         self.initial_fixed: List[List[bool]] = [[False] * 9 for _ in range(9)]
+        # Mirror of the grid contents, updated cell by cell as the user types
+        self._current_board: Board = _solver_core.new_board()
+        # Last background applied to each entry, to skip redundant configs
+        self._bg_state: List[List[str]] = [["white"] * 9 for _ in range(9)]
+        # Entry widget path name -> (row, col), used by the shared key handler
+        self._cell_index: Dict[str, Tuple[int, int]] = {}
+        # Empty cells on the grid and per row, kept up to date by _validate_input
+        self._empty_count = 81
+        self._row_empty: List[int] = [9] * 9
+
+        # Puzzles generated ahead of time by a background thread
+        self._puzzle_queue: "queue.Queue[Board]" = queue.Queue(maxsize=2)
+        threading.Thread(target=self._prefetch_puzzles, daemon=True).start()
 
         self._build_widgets()
         self.new_game()
@@ -138,24 +115,29 @@ class SudokuGUI:
 
         self.entries: List[List[tk.Entry]] = [[None] * 9 for _ in range(9)]
 
+        # Evento: cada vez que se suelta una tecla, revisamos la fila/tablero.
+        # A single class binding serves all 81 cells through their bindtags.
+        self.root.bind_class(self.CELL_BINDTAG, "<KeyRelease>", self._on_cell_change_event)
+
+        # Validate input: only digits 1-9, max length 1.
+        # One Tcl command registration shared by all 81 entries.
+        vcmd = (self.root.register(self._validate_input), "%P", "%s", "%W")
+
         for r in range(9):
             for c in range(9):
-                var = self.board_vars[r][c]
-
-                # Validate input: only digits 1-9, max length 1
-                vcmd = (self.root.register(self._validate_input), "%P")
                 entry = tk.Entry(
                     grid_frame,
                     width=2,
                     justify="center",
                     font=("Consolas", 16),
-                    textvariable=var,
+                    bg="white",
                     validate="key",
                     validatecommand=vcmd
                 )
 
-                # Evento: cada vez que se suelta una tecla, revisamos la fila/tablero
-                entry.bind("<KeyRelease>", lambda event, rr=r, cc=c: self._on_cell_change(rr, cc))
+                tags = entry.bindtags()
+                entry.bindtags((tags[0], self.CELL_BINDTAG) + tags[1:])
+                self._cell_index[str(entry)] = (r, c)
 
                 # Bordes un poco más gruesos entre bloques 3x3 (opcional)
                 padx = (0, 4) if (c + 1) % 3 == 0 and c != 8 else 1
@@ -191,75 +173,155 @@ class SudokuGUI:
     # ------------------ Input validation ------------------ #
     # ------------------------------------------------------ #
     
-    def _validate_input(self, new_value: str) -> bool:
+    def _validate_input(self, new_value: str, old_value: str, widget_name: str) -> bool:
         """
         Validate the content of a cell entry.
 
         Allows:
         - empty string
         - a single digit between 1 and 9
+
+        Every accepted edit is recorded here, since this is the only place
+        that sees all of them (a paste fires no <KeyRelease>, and a key
+        release can land on the next cell): the cached board and the empty
+        cell counters are updated together, so _on_cell_change never has
+        to scan the grid.
         """
-        if new_value == "":
-            return True
-        if len(new_value) > 1:
+        if not (new_value == "" or new_value in _DIGITS):
             return False
-        return new_value in "123456789"
+        row, col = self._cell_index[widget_name]
+        self._current_board[row * 9 + col] = int(new_value) if new_value else 0
+        if (new_value == "") != (old_value == ""):
+            delta = 1 if new_value == "" else -1
+            self._empty_count += delta
+            self._row_empty[row] += delta
+        return True
 
     # ------------------------------------------------ #
     # ------------------ Game logic ------------------ #
     # ------------------------------------------------ #
     
     def new_game(self) -> None:
-        """Generate a new Sudoku puzzle and display it."""
-        puzzle = self.generator.generate_puzzle(clues=35)  # adjust clues for difficulty
+        """Display a new Sudoku puzzle, generating it only if none is ready."""
+        try:
+            puzzle = self._puzzle_queue.get_nowait()
+        except queue.Empty:
+            puzzle = self.generator.generate_puzzle(clues=self.CLUES)
         self._load_board(puzzle)
         self.info_label.config(text="New puzzle generated. Good luck!", fg="black")
 
+    def _prefetch_puzzles(self) -> None:
+        """
+        Worker thread: keep the puzzle queue topped up.
+
+        Blocks while the queue is full, so a new puzzle is generated right
+        after new_game takes one. Never touches Tk widgets.
+        """
+        while True:
+            self._puzzle_queue.put(self.generator.generate_puzzle(clues=self.CLUES))
+
     def _load_board(self, board: Board) -> None:
         """
         Load a board into the UI.
 
-        Cells with a non-zero value are fixed (not editable).
+        Cells with a non-zero value are fixed (not editable). All 81 cells
+        are rewritten by a single Tcl script, and the grid is redrawn once
+        at the end.
         """
+        self._current_board = board[:]
+        cell_script = self._cell_script
+        script = []
         for r in range(9):
+            values = board[r * 9:r * 9 + 9]
+            row_entries = self.entries[r]
+            row_fixed = self.initial_fixed[r]
+            row_bg = self._bg_state[r]
             for c in range(9):
-                value = board[r][c]
-                var = self.board_vars[r][c]
-                entry = self.entries[r][c]
-
-                entry.config(bg="white")  # reset background
-
+                value = values[c]
                 if value == 0:
-                    var.set("")
-                    entry.config(state="normal", disabledforeground="black")
-                    self.initial_fixed[r][c] = False
+                    script.append(cell_script(row_entries[c], "", "normal",
+                                              "-bg white -disabledforeground black"))
+                    row_fixed[c] = False
                 else:
-                    var.set(str(value))
-                    entry.config(state="disabled", disabledforeground="blue")
-                    self.initial_fixed[r][c] = True
+                    script.append(cell_script(row_entries[c], str(value), "disabled",
+                                              "-bg white -disabledforeground blue"))
+                    row_fixed[c] = True
+                row_bg[c] = "white"  # background reset by the script
+        self.root.tk.eval("".join(script))
+        self._recount_empty()
+        self.root.update_idletasks()
 
     def clear_user_cells(self) -> None:
         """Clear all non-fixed cells entered by the user."""
+        cell_script = self._cell_script
+        current = self._current_board
+        script = []
         for r in range(9):
+            row_entries = self.entries[r]
+            row_fixed = self.initial_fixed[r]
+            row_bg = self._bg_state[r]
             for c in range(9):
-                if not self.initial_fixed[r][c]:
-                    self.board_vars[r][c].set("")
-                    self.entries[r][c].config(bg="white")
+                if not row_fixed[c]:
+                    # Left normal again even if Solve disabled it
+                    script.append(cell_script(row_entries[c], "", "normal", "-bg white"))
+                    current[r * 9 + c] = 0
+                    row_bg[c] = "white"
+        self.root.tk.eval("".join(script))
+        self._recount_empty()
         self.info_label.config(text="Cleared user entries.", fg="black")
+        self.root.update_idletasks()
+
+    def _recount_empty(self) -> None:
+        """Recompute the empty cell counters from the cached board."""
+        board = self._current_board
+        self._row_empty = [board[r * 9:r * 9 + 9].count(0) for r in range(9)]
+        self._empty_count = sum(self._row_empty)
+
+    @staticmethod
+    def _cell_script(entry: tk.Entry, text: str, state: str, options: str = "") -> str:
+        """
+        Return Tcl commands that replace an entry's text and set its options.
+
+        The entry is enabled while the text changes and left in 'state'.
+        Validation is switched off meanwhile, so bulk updates do not call
+        back into _validate_input (callers update the cached board and
+        counters themselves). Joining the commands of many cells lets one
+        tk.eval call update the whole grid.
+        """
+        path = str(entry)
+        script = (f"{path} configure -state normal -validate none {options}\n"
+                  f"{path} delete 0 end\n")
+        if text:
+            script += f"{path} insert 0 {text}\n"
+        return script + f"{path} configure -state {state} -validate key\n"
+
+    def _set_bg(self, row: int, col: int, color: str) -> None:
+        """Set a cell background, skipping the Tk call if it is unchanged."""
+        if self._bg_state[row][col] != color:
+            self.entries[row][col].config(bg=color)
+            self._bg_state[row][col] = color
 
     def _get_current_board(self) -> Board:
-        """Return the current board as a 9x9 matrix of integers."""
-        board: Board = [[0] * 9 for _ in range(9)]
+        """Return the current board as a flat 9x9 board of integers."""
+        entries = self.entries
+        board = _solver_core.new_board()
         for r in range(9):
+            row_entries = entries[r]
             for c in range(9):
-                val = self.board_vars[r][c].get()
-                board[r][c] = int(val) if val.isdigit() else 0
+                val = row_entries[c].get()
+                # Entries hold at most one digit (see _validate_input)
+                board[r * 9 + c] = int(val) if val in _DIGITS else 0
         return board
 
     # ------------------------------------------------------------------ #
     # ------------------ Auto checks (fila y tablero) ------------------ #
     # ------------------------------------------------------------------ #
     
+    def _on_cell_change_event(self, event: tk.Event) -> None:
+        """Dispatch a <KeyRelease> on any grid entry to _on_cell_change."""
+        row, col = self._cell_index[str(event.widget)]
+        self._on_cell_change(row, col)
+
     def _on_cell_change(self, row: int, col: int) -> None:
         """
         Called every time the user edits a cell.
@@ -267,53 +329,58 @@ class SudokuGUI:
         - If the whole row is filled (no zeros), automatically checks that row.
         - If the whole board is filled, automatically checks the full solution.
         """
-        board = self._get_current_board()
+        # The cached board is kept in sync by _validate_input, so there is
+        # no need to read anything back from Tk here.
+        board = self._current_board
 
         # ------------------------------------------------------------------ #
         # ---------- Opción 1: verificar automáticamente la FILA ----------- #
         # ------------------------------------------------------------------ #
          
-        if all(board[row][c] != 0 for c in range(9)):
+        if self._row_empty[row] == 0:
             # Row is full -> check if valid
-            if self._is_unit_valid(board[row]):
+            if self._is_unit_valid(board[row * 9:row * 9 + 9]):
                 # Fila correcta → verde suave en celdas no fijas
                 for c in range(9):
                     if not self.initial_fixed[row][c]:
-                        self.entries[row][c].config(bg="#c8e6c9")  # light green
+                        self._set_bg(row, c, "#c8e6c9")  # light green
             else:
                 # Fila incorrecta → rojo suave en celdas no fijas
                 for c in range(9):
                     if not self.initial_fixed[row][c]:
-                        self.entries[row][c].config(bg="#ffcdd2")  # light red
-        else:
+                        self._set_bg(row, c, "#ffcdd2")  # light red
+        elif self._bg_state[row].count("white") != 9:
             # Row not full -> reset color of editable cells to white
             for c in range(9):
                 if not self.initial_fixed[row][c]:
-                    self.entries[row][c].config(bg="white")
+                    self._set_bg(row, c, "white")
                     
         # ------------------------------------------------------------------------- #
         # ---------- Opción 2: verificar automáticamente TODO el tablero ---------- #
         # ------------------------------------------------------------------------- #
         
-        if all(board[r][c] != 0 for r in range(9) for c in range(9)):
-            self.check_solution()
+        if self._empty_count == 0:
+            self.check_solution(board)
 
     # -------------------------------------------------------- #
     # ------------------ Checking & solving ------------------ #
     # -------------------------------------------------------- #
     
-    def check_solution(self) -> None:
+    def check_solution(self, board: Optional[Board] = None) -> None:
         """
         Validate the current grid.
 
         Checks:
         - All cells are filled.
         - Sudoku rules are respected (rows, columns, blocks).
+
+        :param board: already-built board to check; read from the UI if None.
         """
-        board = self._get_current_board()
+        if board is None:
+            board = self._get_current_board()
 
         # Check if any cell is empty
-        if any(board[r][c] == 0 for r in range(9) for c in range(9)):
+        if 0 in board:
             messagebox.showwarning("Incomplete", "The grid is not completely filled.")
             return
 
@@ -325,69 +392,65 @@ class SudokuGUI:
             self.info_label.config(text="Invalid solution. Try again.", fg="red")
 
     def _is_board_valid(self, board: Board) -> bool:
-        """Check if the whole board satisfies Sudoku rules."""
-        # Check rows
-        for r in range(9):
-            if not self._is_unit_valid(board[r]):
-                return False
-
-        # Check columns
-        for c in range(9):
-            col = [board[r][c] for r in range(9)]
-            if not self._is_unit_valid(col):
-                return False
-
-        # Check 3x3 blocks
-        for br in range(3):
-            for bc in range(3):
-                block = []
-                for r in range(br * 3, br * 3 + 3):
-                    for c in range(bc * 3, bc * 3 + 3):
-                        block.append(board[r][c])
-                if not self._is_unit_valid(block):
-                    return False
+        """
+        Check if the whole (completely filled) board satisfies Sudoku rules.
 
-        return True
+        Reuses the solver's single-pass bitmask check (see
+        _solver_core.build_masks), which rejects any repeated number.
+        """
+        if 0 in board or max(board) > 9:
+            return False
+        return _solver_core.build_masks(board, *_solver_core.new_masks())
 
     @staticmethod
-    def _is_unit_valid(unit: List[int]) -> bool:
+    def _is_unit_valid(unit: Sequence[int]) -> bool:
         """
         Check if a row/column/block contains numbers 1-9 without repetition.
         """
-        nums = [n for n in unit if n != 0]
-        return len(nums) == len(set(nums)) and all(1 <= n <= 9 for n in nums)
+        mask = 0
+        for n in unit:
+            if n == 0:
+                continue
+            if not 1 <= n <= 9:
+                return False
+            bit = BIT[n - 1]
+            if mask & bit:
+                return False  # repeated number
+            mask |= bit
+        return True
 
     def solve_puzzle(self) -> None:
         """Attempt to solve the current puzzle and display the solution."""
         board = self._get_current_board()
         if self._solve_backtracking(board):
             # Show solved board
+            self._current_board = board
+            script = []
             for r in range(9):
                 for c in range(9):
-                    self.board_vars[r][c].set(str(board[r][c]))
-                    self.entries[r][c].config(
-                        state="disabled",
-                        disabledforeground="darkgreen"
-                    )
+                    entry = self.entries[r][c]
+                    if self.initial_fixed[r][c]:
+                        script.append(f"{entry} configure -disabledforeground darkgreen\n")
+                    else:
+                        script.append(self._cell_script(entry, str(board[r * 9 + c]), "disabled",
+                                                        "-disabledforeground darkgreen"))
+            self.root.tk.eval("".join(script))
+            self._recount_empty()
             self.info_label.config(text="Puzzle solved.", fg="green")
         else:
             messagebox.showerror("Error", "This puzzle has no solution.")
             self.info_label.config(text="No solution found.", fg="red")
 
     def _solve_backtracking(self, board: Board) -> bool:
-        """Classic backtracking solver for Sudoku."""
-        empty = self.generator._find_empty(board)
-        if not empty:
-            return True
-
-        row, col = empty
-        for num in range(1, 10):
-            if self.generator._is_valid(board, row, col, num):
-                board[row][col] = num
-                if self._solve_backtracking(board):
-                    return True
-                board[row][col] = 0
-        return False
+        """
+        Solve the board in place.
+
+        Naked singles are propagated first, then the remaining cells are
+        searched with MRV backtracking (see _solver_core).
+        """
+        masks = _solver_core.new_masks()
+        return (_solver_core.build_masks(board, *masks)
+                and _solver_core.solve(board, *masks))
 
 
 def main() -> None: